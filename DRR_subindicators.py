@@ -1,108 +1,200 @@
 # 1. Necessary packages: selenium and webdriver_manager
 
 from selenium import webdriver
-from selenium.webdriver.edge.service import Service
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
+from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import atexit
+import multiprocessing
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException, WebDriverException
 import pandas as pd
-import time
 
-# 1.2 Define XPaths for all 10 subindicators
-base_xpath = "/html/body/sfm-root/sfm-top-image-layout/div/div[3]/sfm-analytics-home/div/div[3]/div[2]/sfm-indicators-with-fields/div/div[2]/div/sfm-dropdown-select/div/ul/li/ul/div/li[{}]/span"
-subindicators_xpaths = {f"e1a{i}": base_xpath.format(i) for i in range(1, 11)}
+# 1.2 Define CSS selectors, rooted at the Angular component tags of the page
+selectors = {
+    'subindicator_dropdown': 'sfm-indicators-with-fields > div > div:nth-of-type(2) > div > sfm-dropdown-select > div > ul',
+    'subindicator_option': 'sfm-indicators-with-fields > div > div:nth-of-type(2) > div > sfm-dropdown-select > div > ul > li > ul > div > li:nth-of-type({}) > span',
+    'year_dropdown': 'div.message-wrapper.button-color > span',
+    'year_option': 'span[data-test="dropdownMenu-cycle.{}"]',
+    'table_button': 'sfm-analytics-country-target sfm-analytics-evolution sfm-button-group > div > div:nth-of-type(2) > i',
+    'table': 'sfm-analytics-country-target sfm-analytics-evolution table',
+    'country_name': 'sfm-analytics-country-target sfm-analytics-evolution table > thead > tr > th:nth-of-type(2) > div > div > div:nth-of-type(2)',
+}
+
+# Names of all 10 subindicators, in the order of their dropdown options
+subindicator_names = [f"e1a{i}" for i in range(1, 11)]
+
+# Reads the country name and all [year, value] rows of the table in a single WebDriver call
+extract_table_script = """
+const table = document.querySelector(arguments[0]);
+const header = document.querySelector(arguments[1]);
+return [
+    header.innerText.trim(),
+    Array.from(table.querySelectorAll('tbody tr')).map(row => [row.children[0].innerText.trim(), row.children[1].innerText.trim()])
+];
+"""
+
+# 1.3 Number of parallel workers: each worker process drives its own Chrome instance
+n_workers = 8
+
+# 1.4 Chrome runs headless and skips assets that are never read (images, tracking).
+# Stylesheets and fonts stay loaded: the table button is an icon that needs them to be rendered and clickable
+chrome_arguments = [
+    "--headless=new",
+    "--window-size=1920,1080",
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--disable-background-networking",
+    "--disable-extensions",
+    "--disable-sync",
+    "--mute-audio",
+    "--hide-scrollbars",
+    "--disable-features=AudioServiceOutOfProcess",
+]
+blocked_urls = ["*.png", "*.jpg", "*.gif", "*.svg", "*google-analytics*", "*doubleclick*"]
 
 # 2. Define Functions
 
-def select_subindicator(subindicator_xpath):
+def create_driver(driver_path):
+    """
+    Starts a headless Chrome driver that blocks image and
+    tracking requests via the Chrome DevTools Protocol.
+
+    Args:
+        driver_path (str): Path of the chromedriver executable, resolved once by ChromeDriverManager.
+
+    Returns:
+        webdriver.Chrome: The configured driver.
+    """
+    opts = webdriver.ChromeOptions()
+    for argument in chrome_arguments:
+        opts.add_argument(argument)
+
+    service = Service(driver_path)
+    driver = webdriver.Chrome(options=opts, service=service)
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls})
+    return driver
+
+def find_subindicator_dropdown(wait):
+    """
+    Locates the subindicator dropdown menu once per page load, so the handle can be reused for all subindicators.
+
+    Args:
+        wait (WebDriverWait): Wait object bound to the driver of the current worker.
+
+    Returns:
+        WebElement or None: The dropdown menu, None if it could not be found.
+    """
+    try:
+        return wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selectors['subindicator_dropdown'])))
+    except Exception as e:
+        print(f"Error while locating the subindicator dropdown: {e}")
+        return None
+
+def select_subindicator(wait, dropdown_menu, subindicator_index):
     """
-    Selects the subindicator based on the provided XPath.
+    Selects the subindicator at the given position of the dropdown menu.
 
     Args:
-        subindicator_xpath (str): The XPath of the subindicator to be selected on the website.
+        wait (WebDriverWait): Wait object bound to the driver of the current worker.
+        dropdown_menu (WebElement): Cached handle of the subindicator dropdown menu.
+        subindicator_index (int): Position of the subindicator in the dropdown (1-10).
+
+    Returns:
+        WebElement: The dropdown handle, located again if the cached one went stale.
     """
     
     try:
-        dropdown_menu = wait.until(EC.element_to_be_clickable((By.XPATH, '/html/body/sfm-root/sfm-top-image-layout/div/div[3]/sfm-analytics-home/div/div[3]/div[2]/sfm-indicators-with-fields/div/div[2]/div/sfm-dropdown-select/div/ul')))
-        dropdown_menu.click()
+        try:
+            dropdown_menu.click()
+        except StaleElementReferenceException:
+            dropdown_menu = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selectors['subindicator_dropdown'])))
+            dropdown_menu.click()
 
-        subindicator_option = wait.until(EC.element_to_be_clickable((By.XPATH, subindicator_xpath)))
+        subindicator_option = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selectors['subindicator_option'].format(subindicator_index))))
         subindicator_option.click()
     except Exception as e:
         print(f"Error while selecting subindicator: {e}")
+    return dropdown_menu
 
-def select_year_2005():
+def select_year_2005(wait):
     """
     Selects the year 2005 from the dropdown menu to get Kyogo Framework subindicators
+
+    Args:
+        wait (WebDriverWait): Wait object bound to the driver of the current worker.
     """
     try:
         # First, click to open the dropdown
-        year_dropdown_button = wait.until(EC.element_to_be_clickable((By.XPATH, '//div[@class="message-wrapper button-color"]/span')))
+        year_dropdown_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selectors['year_dropdown'])))
         year_dropdown_button.click()
 
         
-        year_2005_option = wait.until(EC.element_to_be_clickable((By.XPATH, '//span[@data-test="dropdownMenu-cycle.2005"]')))
+        year_2005_option = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selectors['year_option'].format(2005))))
         year_2005_option.click()
     except Exception as e:
         print(f"Error while selecting year 2005: {e}")
 
-def select_year_2024():
+def select_year_2024(wait):
     """
     Selects the year 2024 from the dropdown menu to retreive Sendai Framework subindicators
+
+    Args:
+        wait (WebDriverWait): Wait object bound to the driver of the current worker.
     """
     try:
         # First, click to open the dropdown
-        year_dropdown_button = wait.until(EC.element_to_be_clickable((By.XPATH, '//div[@class="message-wrapper button-color"]/span')))
+        year_dropdown_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selectors['year_dropdown'])))
         year_dropdown_button.click()
 
         # Then, select the year 2024
-        year_2024_option = wait.until(EC.element_to_be_clickable((By.XPATH, '//span[@data-test="dropdownMenu-cycle.2024"]')))
+        year_2024_option = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selectors['year_option'].format(2024))))
         year_2024_option.click()
     except Exception as e:
         print(f"Error while selecting year 2024: {e}")
 
-def click_table_button():
+def click_table_button(wait):
     """
     Clicks the button to display the table with subindicators.
+
+    Args:
+        wait (WebDriverWait): Wait object bound to the driver of the current worker.
     """
     try:
-        # Use the exact XPath to locate table with subindicators
-        table_button = wait.until(EC.element_to_be_clickable((By.XPATH, '/html/body/sfm-root/sfm-top-image-layout/div/div[3]/sfm-analytics-home/div/div[5]/sfm-analytics-country-target/div/div/sfm-analytics-comparison-criteria/sfm-analytics-evolution/div/div[2]/div[1]/sfm-button-group/div/div[2]/i')))
+        table_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selectors['table_button'])))
         table_button.click()
     except Exception as e:
         print(f"Error while clicking the table button: {e}")
 
-def extract_table_data(subindicator_name, country_code):
+def extract_table_data(driver, wait, subindicator_name, country_code):
     """
     Extracts the data from the displayed table and returns it as a DataFrame.
 
     Args:
+        driver (webdriver.Chrome): Driver of the current worker.
+        wait (WebDriverWait): Wait object bound to the driver of the current worker.
         subindicator_name (str): The name of the subindicator being extracted.
         country_code (int): The country code to be added to the DataFrame.
 
     Returns:
         pd.DataFrame: DataFrame containing the extracted data.
     """
-    time.sleep(1)  # Give the page a little time
     try:
-        country_name_element = wait.until(EC.presence_of_element_located((By.XPATH, '/html/body/sfm-root/sfm-top-image-layout/div/div[3]/sfm-analytics-home/div/div[5]/sfm-analytics-country-target/div/div/sfm-analytics-comparison-criteria/sfm-analytics-evolution/div/div[2]/div[2]/table/thead/tr/th[2]/div/div/div[2]')))
-        country_name = country_name_element.text
-        print(f"Extracting data for: {country_name} - {subindicator_name}")
-
-        table = wait.until(EC.presence_of_element_located((By.XPATH, '/html/body/sfm-root/sfm-top-image-layout/div/div[3]/sfm-analytics-home/div/div[5]/sfm-analytics-country-target/div/div/sfm-analytics-comparison-criteria/sfm-analytics-evolution/div/div[2]/div[2]/table')))
-        
-        table_rows = table.find_elements(By.XPATH, './/tbody/tr')
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selectors['country_name'])))
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selectors['table'] + ' tbody tr')))
 
-        data = []
-        for row in table_rows:
-            year = row.find_element(By.XPATH, './td[1]').text  # Extract the year
-            value = row.find_element(By.XPATH, './td[2]').text  # Extract the value
-            data.append({'Country': country_name, 'Year': year, subindicator_name: value, 'Country_Code': country_code})
+        # Header and all rows come back in one round trip instead of one find_element call per cell
+        country_name, rows = driver.execute_script(extract_table_script, selectors['table'], selectors['country_name'])
+        print(f"Extracting data for: {country_name} - {subindicator_name}")
 
-        df = pd.DataFrame(data)
+        df = pd.DataFrame(rows, columns=['Year', subindicator_name])
+        df.insert(0, 'Country', country_name)
+        df['Country_Code'] = country_code
         print(f"Table data extracted successfully for {country_name} - {subindicator_name}.")
         return df
 
@@ -110,171 +202,346 @@ def extract_table_data(subindicator_name, country_code):
         print(f"Error while extracting table data: {e}")
         return None
 
-def run_scraping(subindicators_xpaths, base_year, country_list):
+def find_first_table_row(driver):
+    """
+    Returns the first data row of the table, or None if no table rows are shown yet.
 
-    # empty list to hold all country data
-    all_country_container = []
+    Args:
+        driver (webdriver.Chrome): Driver of the current worker.
+    """
+    elements = driver.find_elements(By.CSS_SELECTOR, selectors['table'] + ' tbody tr')
+    return elements[0] if elements else None
 
-    for country_code in country_list:
-        url = f'https://sendaimonitor.undrr.org/analytics/country-global-target/11/6?indicator=73&countries={country_code}'
-        driver.get(url)
-        click_table_button()
-        # Extract data for 2015-2024 (Sendai Framework) or 2005-2015 (Kyogo Framework)
-        if base_year == 2005:
-            select_year_2005()
+def select_subindicator_and_wait(driver, wait, dropdown_menu, subindicator_index):
+    """
+    Selects a subindicator and polls until the table rows have been re-rendered, so
+    scraping continues as soon as the new data is in the DOM instead of after a fixed sleep.
+    The wait is tied to the data rows: the country header shows the same country
+    for every subindicator and is not necessarily re-created.
+
+    Args:
+        driver (webdriver.Chrome): Driver of the current worker.
+        wait (WebDriverWait): Wait object bound to `driver`.
+        dropdown_menu (WebElement): Cached handle of the subindicator dropdown menu.
+        subindicator_index (int): Position of the subindicator in the dropdown (1-10).
+
+    Returns:
+        tuple: The dropdown handle to reuse for the next subindicator, and whether the
+        table was re-rendered (False means the shown rows may still belong to the previous selection).
+    """
+    old_row = find_first_table_row(driver)
+    dropdown_menu = select_subindicator(wait, dropdown_menu, subindicator_index)
+    try:
+        # Same 30s timeout as every other wait: the site is slow, a short cap would turn latency spikes into failures
+        if old_row is None:
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selectors['table'] + ' tbody tr')))
         else:
-            select_year_2024()
-        
-        # Container df for current country
-        country_df = pd.DataFrame()
-
-        # Initialize a flag to track the first subindicator iteration
-        first_iteration = True
-
-        # Loop through the 10 subindicators (The dictionary is defined above)
-        for subindicator_index, (subindicator_name, subindicator_xpath) in enumerate(subindicators_xpaths.items(), start=1):
-            
-            if first_iteration:
-                # Click on the second subindicator first, then go back to the first : This is a workaround to avoid the issue of the table not refreshing when selecting the year dropdown
-                second_subindicator_xpath = '/html/body/sfm-root/sfm-top-image-layout/div/div[3]/sfm-analytics-home/div/div[3]/div[2]/sfm-indicators-with-fields/div/div[2]/div/sfm-dropdown-select/div/ul/li/ul/div/li[2]/span'  # Assuming 'e1a2' is the second subindicator
-                select_subindicator(second_subindicator_xpath)
-                time.sleep(1)  # Wait for 1 second
-                # Now, select the first subindicator
-                select_subindicator(subindicator_xpath)
-                time.sleep(1)  # Wait for 1 second
-
-                first_iteration = False  # Set the flag to False after the first iteration
-            else:
-                # Normal behavior for subsequent subindicators
-                select_subindicator(subindicator_xpath)
+            wait.until(EC.staleness_of(old_row))
+    except TimeoutException:
+        print(f"Table was not re-rendered after selecting subindicator {subindicator_index}.")
+        return dropdown_menu, False
+    return dropdown_menu, True
 
+def scrape_country(driver, wait, subindicator_names, base_year, country_code):
+    """
+    Scrapes all subindicators of one country.
+
+    Args:
+        driver (webdriver.Chrome): Driver used to load the country page.
+        wait (WebDriverWait): Wait object bound to `driver`.
+        subindicator_names (list): Subindicator names, in the order of their dropdown options.
+        base_year (int): 2024 for Sendai Framework or 2005 for Kyogo Framework data.
+        country_code (int): Country code to scrape.
+
+    Returns:
+        pd.DataFrame or None: Wide table of the country (Country, Country_Code, Year, subindicators), None if it failed.
+    """
+    url = f'https://sendaimonitor.undrr.org/analytics/country-global-target/11/6?indicator=73&countries={country_code}'
+    driver.get(url)
+    click_table_button(wait)
+    # Extract data for 2015-2024 (Sendai Framework) or 2005-2015 (Kyogo Framework)
+    if base_year == 2005:
+        select_year_2005(wait)
+    else:
+        select_year_2024(wait)
+
+    # The dropdown menu stays the same element for all subindicators of this page
+    dropdown_menu = find_subindicator_dropdown(wait)
+    if dropdown_menu is None:
+        print(f"Skipping country code {country_code} in {base_year} data.")
+        return None
+    
+    # Year-indexed columns of the current country, one per subindicator
+    country_columns = {}
+    country_name = None
+
+    # Initialize a flag to track the first subindicator iteration
+    first_iteration = True
+
+    # Loop through the 10 subindicators (The list is defined above)
+    for subindicator_index, subindicator_name in enumerate(subindicator_names, start=1):
         
-            df = extract_table_data(subindicator_name,country_code)  # Pass country_code to the function
-            
-            if df is not None:
-                if country_df.empty:
-                    country_df = df
-                else:
-                    country_df = pd.merge(country_df, df, on=['Country', 'Year', 'Country_Code'], how='outer')
-            else:
-                print(f"Failed to extract data for subindicator {subindicator_name} in {base_year} data and country code {country_code}.")
-        
-        if not country_df.empty:
-            all_country_container.append(country_df)
-            print(f"Full {base_year} data for country code {country_code} extracted successfully.")
+        if first_iteration:
+            # Click on the second subindicator first, then go back to the first : This is a workaround to avoid the issue of the table not refreshing when selecting the year dropdown
+            dropdown_menu, _ = select_subindicator_and_wait(driver, wait, dropdown_menu, 2)  # Assuming 'e1a2' is the second subindicator
+            # Now, select the first subindicator
+            dropdown_menu, refreshed = select_subindicator_and_wait(driver, wait, dropdown_menu, subindicator_index)
+
+            first_iteration = False  # Set the flag to False after the first iteration
+        else:
+            # Normal behavior for subsequent subindicators
+            dropdown_menu, refreshed = select_subindicator_and_wait(driver, wait, dropdown_menu, subindicator_index)
+
+        if not refreshed:
+            # The table would still show the previous subindicator: leave the country out so the retry pass picks it up
+            print(f"Skipping country code {country_code} in {base_year} data: table did not refresh, leaving it for the retry.")
+            return None
 
+        df = extract_table_data(driver, wait, subindicator_name, country_code)  # Pass country_code to the function
+        
+        if df is not None and not df.empty:
+            country_columns[subindicator_name] = df.set_index('Year')[subindicator_name]
+            country_name = df['Country'].iat[0]
+        else:
+            print(f"Failed to extract data for subindicator {subindicator_name} in {base_year} data and country code {country_code}.")
     
-    final_df = pd.concat(all_country_container, ignore_index=True)
-    # final_df_2024.to_csv(r"V:\ENVINFO\BACKUP\STATA\IPAC\CAP\Excel files\1_RawDataCAP\Extension\DRR_Sendai_2015_2024_subindicator_e1.csv", index=False)
+    if not country_columns:
+        return None
+
+    # Build the wide country table once instead of merging after every subindicator
+    country_df = pd.concat(country_columns, axis=1).rename_axis('Year').reset_index()
+    country_df.insert(0, 'Country', country_name)
+    country_df['Country_Code'] = country_code
+    return country_df
+
+def run_scraping(driver, wait, subindicator_names, base_year, country_list):
+    """
+    Scrapes all subindicators for the given countries with one driver.
+
+    Args:
+        driver (webdriver.Chrome): Driver used to load the country pages.
+        wait (WebDriverWait): Wait object bound to `driver`.
+        subindicator_names (list): Subindicator names, in the order of their dropdown options.
+        base_year (int): 2024 for Sendai Framework or 2005 for Kyogo Framework data.
+        country_list (iterable): Country codes to scrape.
+
+    Returns:
+        pd.DataFrame: Data for all successfully scraped countries (empty if none succeeded).
+    """
+
+    # empty list to hold all country data, every country table gets the same column order
+    all_country_container = []
+    output_columns = ['Country', 'Country_Code', 'Year'] + list(subindicator_names)
 
+    for country_code in country_list:
+        try:
+            country_df = scrape_country(driver, wait, subindicator_names, base_year, country_code)
+        except WebDriverException as e:
+            # Page-load timeouts or a crashed browser only cost this country, it is picked up by the retry pass
+            print(f"Browser error for country code {country_code} in {base_year} data: {e}")
+            continue
+
+        if country_df is not None:
+            all_country_container.append(country_df.reindex(columns=output_columns))
+            print(f"Full {base_year} data for country code {country_code} extracted successfully.")
+
+    if not all_country_container:
+        return pd.DataFrame(columns=output_columns)
 
+    final_df = pd.concat(all_country_container, ignore_index=True, copy=False)
 
     return final_df
 
+def init_worker(driver_path):
+    """
+    Pool initializer: starts one Chrome driver per worker process. The driver is kept
+    in a worker-global and reused for every chunk, phase and retry the worker handles,
+    so it never has to be pickled. scrape_chunk replaces it if the browser crashed.
+    It is closed when the worker process exits.
+
+    Args:
+        driver_path (str): Path of the chromedriver executable.
+    """
+    global worker_driver_path
+    worker_driver_path = driver_path
+    start_worker_driver()
+
+def start_worker_driver():
+    """
+    Starts the Chrome driver of the current worker process and stores it in the
+    worker-globals `worker_driver` and `worker_wait`. It is closed when the worker exits.
+    """
+    global worker_driver, worker_wait
+    worker_driver = create_driver(worker_driver_path)
+    worker_wait = WebDriverWait(worker_driver, 30, poll_frequency=0.1)
+    atexit.register(worker_driver.quit)
+
+def scrape_chunk(subindicator_names, base_year, country_list):
+    """
+    Worker function: scrapes a chunk of countries with the browser of the current worker.
 
-## 3. first run: 2015-2024 data for all countries
+    Args:
+        subindicator_names (list): Subindicator names, in the order of their dropdown options.
+        base_year (int): 2024 for Sendai Framework or 2005 for Kyogo Framework data.
+        country_list (list): Country codes handled by this worker.
 
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service)
-wait = WebDriverWait(driver, 30)
-df_2024 = run_scraping(subindicators_xpaths = subindicators_xpaths , base_year=2024 , country_list=range(1, 194))
-driver.quit()
+    Returns:
+        pd.DataFrame: Data for the countries of this chunk.
+    """
+    # Reset the session state left over from the previous chunk; this also tells whether the browser is still alive
+    try:
+        worker_driver.delete_all_cookies()
+    except WebDriverException:
+        # The browser of this worker crashed: replace it, otherwise every later chunk of this worker fails too
+        print("Browser of this worker is not responding, starting a new one.")
+        atexit.unregister(worker_driver.quit)
+        try:
+            worker_driver.quit()
+        except Exception:
+            pass
+        start_worker_driver()
+    return run_scraping(worker_driver, worker_wait, subindicator_names, base_year, country_list)
+
+def run_scraping_parallel(executor, subindicator_names, base_year, country_list, max_workers=n_workers):
+    """
+    Splits the country list across worker processes, each driving its own browser,
+    and combines their results. Scraping is bound by page loads, not CPU, so the
+    runtime drops roughly linearly with the number of workers.
 
-# Get missing countries for retries
-extracted_country_codes = final_df_2024['Country_Code'].unique()
-missing_country_codes = set(range(1, 194)) - set(extracted_country_codes)
+    Args:
+        executor (ProcessPoolExecutor): Pool started with init_worker, shared by all phases.
+        subindicator_names (list): Subindicator names, in the order of their dropdown options.
+        base_year (int): 2024 for Sendai Framework or 2005 for Kyogo Framework data.
+        country_list (iterable): Country codes to scrape.
+        max_workers (int): Number of worker processes / browsers in the pool.
 
-if missing_country_codes:
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service)
-    wait = WebDriverWait(driver, 30)
-    df_2024_missing = run_scraping(subindicators_xpaths = subindicators_xpaths , base_year=2024 , country_list=missing_country_codes)
-    driver.quit()
-    full_df_2024 = pd.concat([df_2024, df_2024_missing], ignore_index=True)
-else:
-    full_df_2024 = df_2024
+    Returns:
+        pd.DataFrame: Data for all successfully scraped countries (empty, with the output columns, if none succeeded).
+    """
+    country_list = sorted(country_list)
+    # Interleave the countries so every worker gets a similar mix of slow and fast pages
+    chunks = [country_list[i::max_workers] for i in range(max_workers)]
+    chunks = [chunk for chunk in chunks if chunk]
 
-# concat first iteration data and retry dataframe for 2015-2024 data
+    results = executor.map(scrape_chunk, repeat(subindicator_names), repeat(base_year), chunks)
+    results = [df for df in results if not df.empty]
 
+    # Keep the columns when no country succeeded (e.g. a retry of countries without data), so callers can still select them
+    if not results:
+        return pd.DataFrame(columns=['Country', 'Country_Code', 'Year'] + list(subindicator_names))
 
-full_df_2024 = full_df_2024.sort_values(by=['Country', 'Year'], inplace=True)
-full_df_2024.to_csv(r"V:\ENVINFO\BACKUP\STATA\IPAC\CAP\Excel files\1_RawDataCAP\Extension\DRR_Sendai_2015_2024_subindicators.csv", index=False)
+    return pd.concat(results, ignore_index=True, copy=False)
 
 
+def main():
 
+    # Resolve the chromedriver once: ChromeDriverManager().install() checks the release feed online on every call
+    driver_path = ChromeDriverManager().install()
 
-### 4. Now 2005-2015 data (Kyogo Framework): Webpage does not allow for scraping all years in one go
+    # One pool of browsers for both phases and all retries; each worker keeps its driver until the pool shuts down.
+    # "spawn" gives the same start method on every platform (the Windows default), so the drivers are quit on worker exit
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context("spawn"), initializer=init_worker, initargs=(driver_path,)) as executor:
 
-## first run: 2015-2024 data
+        ## 3. first run: 2015-2024 data for all countries
 
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service)
-wait = WebDriverWait(driver, 30)
-df_2005 = run_scraping(subindicators_xpaths = subindicators_xpaths , base_year=2005 , country_list=range(1, 194))
-driver.quit()
+        df_2024 = run_scraping_parallel(executor, subindicator_names = subindicator_names , base_year=2024 , country_list=range(1, 194))
 
-# Get missing countries for retries
-extracted_country_codes = df_2005['Country_Code'].unique()
-missing_country_codes = set(range(1, 194)) - set(extracted_country_codes)
+        # Get missing countries for retries
+        extracted_country_codes = df_2024['Country_Code'].unique()
+        missing_country_codes = set(range(1, 194)) - set(extracted_country_codes)
 
-if missing_country_codes:
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service)
-    wait = WebDriverWait(driver, 30)
-    df_2005_missing = run_scraping(subindicators_xpaths = subindicators_xpaths , base_year=2005 , country_list=missing_country_codes)
-    driver.quit()
-    full_df_2005 = pd.concat([df_2005, df_2005_missing], ignore_index=True)
-else:
-    full_df_2005 = df_2005
+        if missing_country_codes:
+            df_2024_missing = run_scraping_parallel(executor, subindicator_names = subindicator_names , base_year=2024 , country_list=missing_country_codes)
+            full_df_2024 = pd.concat([df_2024, df_2024_missing], ignore_index=True, copy=False)
+        else:
+            full_df_2024 = df_2024
 
-# concat first iteration data and retry dataframe for 2015-2024 data
+        # concat first iteration data and retry dataframe for 2015-2024 data
 
 
-full_df_2005.sort_values(by=['Country', 'Year'], inplace=True)
-final_df_2005 = full_df_2005[full_df_2005['Year'] != "2015"]
+        # The workers return their countries interleaved, so sort the 2015-2024 data for the CSV
+        full_df_2024.sort_values(by=["Country", "Year"], kind='mergesort').to_csv(r"V:\ENVINFO\BACKUP\STATA\IPAC\CAP\Excel files\1_RawDataCAP\Extension\DRR_Sendai_2015_2024_subindicators.csv", index=False)
 
 
-### 5. Combine both dataframes and save to xlsx
 
 
-final_df = pd.concat([final_df_2005, final_df_2024])
-final_df = final_df.sort_values(by=["Country", "Year"])
-final_df["Year"] = pd.to_numeric(final_df["Year"], errors='coerce').astype(int)
+        ### 4. Now 2005-2015 data (Kyogo Framework): Webpage does not allow for scraping all years in one go
 
-# save to Excel
+        ## first run: 2015-2024 data
 
+        df_2005 = run_scraping_parallel(executor, subindicator_names = subindicator_names , base_year=2005 , country_list=range(1, 194))
 
-with pd.ExcelWriter(r"V:\ENVINFO\BACKUP\STATA\IPAC\CAP\Excel files\1_RawDataCAP\Extension\DRR_Sendai_Kyogo_Subindicators_E1.xlsx", engine='xlsxwriter') as writer:
-    final_df.to_excel(writer, sheet_name='Data', index=False)
-    
-    readme_text = (
-        "Data Source:\n"
-        "This dataset is extracted from the Sendai Monitor (UNDRR) website, which provides data on subindicators related to disaster risk reduction strategies.\n"
-        "Link: https://sendaimonitor.undrr.org/analytics/country-global-target/20/6?indicator=73 \n\n"
-        "Data is scraped in this Python script: \\\\main.oecd.org\\ASgenENV\\ENVINFO\\BACKUP\\STATA\\IPAC\\CAP\\Others\\Scraping_Scripts\\DRR_subindicators.py\n"
-        "Beware: Script runs a long time (~5h). Python version used was 3.11.7 \n"          
-        "The data for the years 2005-2015 (Kyogo Framework) and 2015-2024 (Sendai Framework) were extracted separately and then combined.\n\n"
-        "Variables:\n"
-        "   • Country\n"
-        "   • Year\n"
-        "   • e1a[i]: Subindicator data for each subindicator (e1a1 to e1a10).\n\n"
-        "Notes on subindicators:\n"
-        "• 1: Have objectives and measures aimed at reducing existing risk\n"
-        "• 2: Have objectives and measures aimed at preventing the creation of risk\n"
-        "• 3: Have objectives and measures aimed at strengthening economic, social, health, and environmental resilience\n"
-        "• 4: Have time frames, targets, and indicators\n"
-        "• 5: Address Priority 1 recommendations and suggestions\n"
-        "• 6: Address Priority 2 recommendations and suggestions\n"
-        "• 7: Address Priority 3 recommendations and suggestions\n"
-        "• 8: Address Priority 4 recommendations and suggestions\n"
-        "• 9: Interacted at all levels with development and poverty eradication plans and policy, notably with the SDGs.\n"
-        "• 10: Promote coherence, interaction, and compliance with CC adaptation and mitigation plans, with the Paris Agreement\n\n"
-        "Please refer to the 'Data' sheet for the processed data."
-    )
-    
-    workbook = writer.book
-    readme_sheet = workbook.add_worksheet('Readme')
-    cell_format = workbook.add_format({'text_wrap': True, 'valign': 'top'})
-    readme_sheet.merge_range('A1:F40', readme_text, cell_format)
-    readme_sheet.set_column('A:F', 20)
+        # Get missing countries for retries
+        extracted_country_codes = df_2005['Country_Code'].unique()
+        missing_country_codes = set(range(1, 194)) - set(extracted_country_codes)
 
+        if missing_country_codes:
+            df_2005_missing = run_scraping_parallel(executor, subindicator_names = subindicator_names , base_year=2005 , country_list=missing_country_codes)
+            full_df_2005 = pd.concat([df_2005, df_2005_missing], ignore_index=True, copy=False)
+        else:
+            full_df_2005 = df_2005
+
+        # concat first iteration data and retry dataframe for 2015-2024 data
+
+
+        final_df_2005 = full_df_2005[full_df_2005['Year'] != "2015"]
+
+
+    ### 5. Combine both dataframes and save to xlsx
+
+
+    # Sort the combined data for the Excel output (stable mergesort keeps the scraped row order within ties)
+    final_df = pd.concat([final_df_2005, full_df_2024], ignore_index=True, copy=False)
+    final_df = final_df.sort_values(by=["Country", "Year"], kind='mergesort')
+    final_df["Year"] = pd.to_numeric(final_df["Year"], errors='coerce').astype(int)
+
+    # save to Excel
+
+
+    # constant_memory streams each row to disk once the next row is started, which keeps peak memory low
+    with pd.ExcelWriter(r"V:\ENVINFO\BACKUP\STATA\IPAC\CAP\Excel files\1_RawDataCAP\Extension\DRR_Sendai_Kyogo_Subindicators_E1.xlsx", engine='xlsxwriter', engine_kwargs={'options': {'constant_memory': True}}) as writer:
+
+        readme_text = (
+            "Data Source:\n"
+            "This dataset is extracted from the Sendai Monitor (UNDRR) website, which provides data on subindicators related to disaster risk reduction strategies.\n"
+            "Link: https://sendaimonitor.undrr.org/analytics/country-global-target/20/6?indicator=73 \n\n"
+            "Data is scraped in this Python script: \\\\main.oecd.org\\ASgenENV\\ENVINFO\\BACKUP\\STATA\\IPAC\\CAP\\Others\\Scraping_Scripts\\DRR_subindicators.py\n"
+            "Beware: Script runs a long time (~5h). Python version used was 3.11.7 \n"          
+            "The data for the years 2005-2015 (Kyogo Framework) and 2015-2024 (Sendai Framework) were extracted separately and then combined.\n\n"
+            "Variables:\n"
+            "   • Country\n"
+            "   • Year\n"
+            "   • e1a[i]: Subindicator data for each subindicator (e1a1 to e1a10).\n\n"
+            "Notes on subindicators:\n"
+            "• 1: Have objectives and measures aimed at reducing existing risk\n"
+            "• 2: Have objectives and measures aimed at preventing the creation of risk\n"
+            "• 3: Have objectives and measures aimed at strengthening economic, social, health, and environmental resilience\n"
+            "• 4: Have time frames, targets, and indicators\n"
+            "• 5: Address Priority 1 recommendations and suggestions\n"
+            "• 6: Address Priority 2 recommendations and suggestions\n"
+            "• 7: Address Priority 3 recommendations and suggestions\n"
+            "• 8: Address Priority 4 recommendations and suggestions\n"
+            "• 9: Interacted at all levels with development and poverty eradication plans and policy, notably with the SDGs.\n"
+            "• 10: Promote coherence, interaction, and compliance with CC adaptation and mitigation plans, with the Paris Agreement\n\n"
+            "Please refer to the 'Data' sheet for the processed data."
+        )
+
+        workbook = writer.book
+        readme_sheet = workbook.add_worksheet('Readme')
+        cell_format = workbook.add_format({'text_wrap': True, 'valign': 'top'})
+        readme_sheet.merge_range('A1:F40', readme_text, cell_format)
+        readme_sheet.set_column('A:F', 20)
+
+        # Rows have to be written top-down in constant_memory mode. to_excel writes column by column,
+        # so the data rows are streamed directly (missing values as empty cells)
+        data_sheet = workbook.add_worksheet('Data')
+        data_sheet.write_row(0, 0, final_df.columns)
+        data_rows = final_df.astype(object).where(final_df.notna(), None)
+        for row_number, row in enumerate(data_rows.itertuples(index=False), start=1):
+            data_sheet.write_row(row_number, 0, row)
+
+
+# Worker processes re-import this module (spawn start method on Windows), so the
+# scraping must only start from the main process
+if __name__ == "__main__":
+    main()
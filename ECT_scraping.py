@@ -1,5 +1,8 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from selectolax.parser import HTMLParser
 import pandas as pd
 import numpy as np
 from openpyxl import Workbook
@@ -12,8 +15,14 @@ from openpyxl.utils.dataframe import dataframe_to_rows
 url = 'https://www.energychartertreaty.org/treaty/contracting-parties-and-signatories/'
 output_path = r"V:\ENVINFO\BACKUP\STATA\IPAC\CAP\Excel files\1_RawDataCAP\Extension\Energy_charter_treaty_2024.xlsx"
 
+## 1.1 Shared HTTP session: keeps connections to the ECT website alive across requests and retries transient errors
+n_threads = 16
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=n_threads, pool_maxsize=n_threads, max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])))
+request_timeout = (5, 15)  # (connect, read) in seconds
 
-## 1.1 Manually define withdrawal data
+
+## 1.2 Manually define withdrawal data
 withdrawal_data = {
     'Italy': {
         'date_withdrawal_notification': '2014-12-31',
@@ -65,20 +74,39 @@ def fetch_country_links(url):
     Returns:
         dict: Dictionary containing country names as keys and their respective URLs as values.
     """
-    response = requests.get(url)
+    response = session.get(url, timeout=request_timeout)
     response.raise_for_status()
-    soup = BeautifulSoup(response.text, 'html.parser')
+    tree = HTMLParser(response.text)
 
     country_links = {}
-    for figure in soup.find_all('figure', class_='image'):
-        a_tag = figure.find('a')
+    for figure in tree.css('figure.image'):
+        a_tag = figure.css_first('a')
         if a_tag:
-            country_name = a_tag.get('title')
-            country_url = a_tag.get('href')
+            country_name = a_tag.attributes.get('title')
+            country_url = a_tag.attributes.get('href')
             country_links[country_name] = f'https://www.energychartertreaty.org{country_url}'
 
     return country_links
 
+def next_in_document(node):
+    """
+    Returns the node that follows the given node in document order:
+    its first child, otherwise the next sibling of the node or of its closest ancestor.
+    
+    Args:
+        node (selectolax.parser.Node): The current node.
+        
+    Returns:
+        selectolax.parser.Node or None: The following node, None at the end of the document.
+    """
+    if node.child is not None:
+        return node.child
+    while node is not None:
+        if node.next is not None:
+            return node.next
+        node = node.parent
+    return None
+
 def scrape_country_data(country, link):
     """
     Main scraping function: Takes dictionary of country and links an  
@@ -92,25 +120,25 @@ def scrape_country_data(country, link):
         list: List containing the country data.
     """
     # send get request to fetch HTML content
-    response = requests.get(link)
+    response = session.get(link, timeout=request_timeout)
     response.raise_for_status() # Raises an error when website doesnt respond
     
     # parse the HTML content
-    soup = BeautifulSoup(response.text, 'html.parser')
+    tree = HTMLParser(response.text)
 
     # find the section containing the data on Energy Charter Treaty
-    section = soup.find('strong', string=lambda text: text and '1994 Energy Charter Treaty' in text)
+    section = next((strong for strong in tree.css('strong') if '1994 Energy Charter Treaty' in strong.text()), None)
     
     try:
         print(f"Processing country: {country}, URL: {link}")  # Debug print
         if section:
-            title = section.get_text(strip=True)
+            title = section.text(strip=True)
             dates = []
-            next_element = section.find_next()
-            while next_element and (next_element.name != 'strong'):
-                if next_element.name == 'ul':
-                    dates.extend([li.get_text(strip=True) for li in next_element.find_all('li')])
-                next_element = next_element.find_next()
+            next_element = next_in_document(section)
+            while next_element and (next_element.tag != 'strong'):
+                if next_element.tag == 'ul':
+                    dates.extend([li.text(strip=True) for li in next_element.css('li')])
+                next_element = next_in_document(next_element)
             while len(dates) < 4:  # fill in missing dates with None if less than 4 dates are found
                 dates.append(None)
             print(f"Scraped data for {country}")
@@ -121,28 +149,22 @@ def scrape_country_data(country, link):
             print(f"An error occurred for country: {country}, URL: {link}")
             print(f"Error: {e}")
 
-def extract_date(text, prefix):
+def extract_year(texts, prefix):
     """
-    Extracts the date - in this case year - from a text string based on the given prefix.
+    Extracts the date - in this case year - following the given prefix, for a whole column at once.
 
     " signed on 12 December 1994" -> 1994 "
     
     Args:
-        text (str): The text containing the date.
+        texts (pd.Series): Column containing the date strings.
         prefix (str): The prefix to look for in the text.
 
     Returns:
-        int or None: The extracted year as an integer, or None if not found.
+        pd.Series: The extracted years, NaN where the prefix or a valid date is not found.
     
     """
-    if pd.isnull(text):
-        return None
-    if prefix in text:
-        try:
-            return pd.to_datetime(text.split(prefix)[1].strip(), format='%d %B %Y').year
-        except (IndexError, ValueError):
-            return None
-    return None
+    dates = texts.str.split(prefix, n=1).str[1].str.strip()
+    return pd.to_datetime(dates, format='%d %B %Y', errors='coerce').dt.year
 
 def update_dataframe_withdrawals(df, withdrawal_data):
     """
@@ -156,18 +178,18 @@ def update_dataframe_withdrawals(df, withdrawal_data):
         pd.DataFrame: The updated dataframe.
     """
     
-    ## loops over manually created withdrawal dictionary
-
-    for country, dates in withdrawal_data.items():
-        if country in df['Country'].values:
-            for key, value in dates.items():
-                if value != 'N.A.':
-                    df.loc[df['Country'] == country, key] = pd.to_datetime(value).year
-                else:
-                    df.loc[df['Country'] == country, key] = value
-        else:
-            new_row = {**{'Country': country}, **{k: (pd.to_datetime(v).year if v != 'N.A.' else v) for k, v in dates.items()}}
-            df = pd.concat([df, pd.DataFrame(new_row, index=[0])], ignore_index=True)
+    ## one row per country from the manually created withdrawal dictionary, dates converted to years
+    withdrawals = pd.DataFrame.from_dict(withdrawal_data, orient='index')
+    years = withdrawals.apply(lambda col: pd.to_datetime(col, errors='coerce').dt.year)
+    withdrawals = years.where(withdrawals != 'N.A.', 'N.A.')  # keep explicit 'N.A.' entries as they are
+
+    ## overwrite the dates of countries already in the data in one aligned update (missing dates are left untouched)
+    df = df.set_index('Country')
+    df.update(withdrawals)
+
+    ## append countries that no longer appear on the website
+    new_countries = withdrawals[~withdrawals.index.isin(df.index)]
+    df = pd.concat([df, new_countries]).rename_axis('Country').reset_index()
 
     return df
 
@@ -222,22 +244,20 @@ def main():
     country_links = fetch_country_links(url)
 
 
-    # loop over countries and extract data
-    all_data = []
-    for country, link in country_links.items():
-        data = scrape_country_data(country, link)
-        if data:
-            all_data.append(data)
+    # extract data for all countries concurrently (results keep the order of country_links)
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        results = executor.map(lambda item: scrape_country_data(*item), country_links.items())
+        all_data = [data for data in results if data]
 
     # store in Dataframe and clean a little
     df = pd.DataFrame(all_data)
     df.rename(columns={0: 'Country', 1: 'Title', 2: 'Signature', 3: 'Ratification', 4: 'Deposition', 5: 'Entry into Force', 6: 'Additional'}, inplace=True)
 
     # extract dates from strings
-    df['date_sign'] = df.apply(lambda row: extract_date(row['Signature'], 'signed on'), axis=1)
-    df['date_ratification'] = df.apply(lambda row: extract_date(row['Ratification'], 'ratified on'), axis=1)
-    df['date_deposit'] = df.apply(lambda row: extract_date(row['Deposition'], 'deposited on'), axis=1)
-    df['date_entry_force'] = df.apply(lambda row: extract_date(row['Entry into Force'], 'entered into force on'), axis=1)
+    df['date_sign'] = extract_year(df['Signature'], 'signed on')
+    df['date_ratification'] = extract_year(df['Ratification'], 'ratified on')
+    df['date_deposit'] = extract_year(df['Deposition'], 'deposited on')
+    df['date_entry_force'] = extract_year(df['Entry into Force'], 'entered into force on')
     df['date_withdrawal_notification'] = None
     df['date_withdrawal_effect'] = None
 
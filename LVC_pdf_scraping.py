@@ -76,44 +76,40 @@ country_pages = {
 # 1.3 LVC data variables
 columns = ["Instrument (OECD-Lincoln taxonomy)", "Local name", "National legal provision", "Implementation", "Use"]
 
-# 1.4 Path where xlsx will be stored
+# 1.4 Standalone 4-digit years between 1800 and 2025, bounds are enforced by the pattern itself
+year_pattern = re.compile(r'\b(1[89]\d{2}|20[01]\d|202[0-5])\b')
+
+# 1.5 Path where xlsx will be stored
 
 output_path = "//main.oecd.org/ASgenENV/ENVINFO/BACKUP/STATA/IPAC/CAP/Excel files/1_RawDataCAP/Extension/LVC.xlsx"
 
 ### 2. Define functions
 
-def extract_valid_years(text):
+def extract_valid_years(provisions):
     """
-    Extracts the year in which the national legal provision 
-    based on the string provided in the national legal provision
-    column. Applied to each row in function extract_LVC_Data
+    Extracts the years in which the national legal provisions 
+    were passed, based on the strings provided in the national legal provision
+    column. Works on the whole column at once in extract_LVC_Data
 
     Input:
-            - text: string containing the national legal provision
+            - provisions: Series of strings containing the national legal provisions
 
     Output:
 
-            - valid_years: list of valid years extracted from the text
+            - valid_years: Series with a list of valid years per row (None if no year is found)
 
     """
-    # Regular expression to find sequences of 4 digits
-    year_pattern = r'\b\d{4}\b'
-    
-    # Find all matches of the pattern in the text
-    matches = re.findall(year_pattern, text)
-    
-    # Filter matches to include only years between 1900 and 2025
-    valid_years = [int(year) for year in matches if 1800 <= int(year) <= 2025]
+    matches = provisions.fillna('').str.findall(year_pattern)
     
-    return valid_years if valid_years else None  
-        
+    return matches.apply(lambda years: [int(year) for year in years] or None)
+
 
 
 
 def extract_LVC_Data(pdf_file, dictionary, columns, output_path):
     """
-    Loops over countries and respective pages in the predefined 
-    dictionary and extracts the country tables from the pdf. 
+    Extracts the country tables on the pages listed in the predefined 
+    dictionary from the pdf in a single read. 
     Concatenates all country Dataframes into one and applies
     some datacleaning steps.
     
@@ -130,44 +126,45 @@ def extract_LVC_Data(pdf_file, dictionary, columns, output_path):
 
     dfs = []
 
-    # Iterate through each country and its respective page number
-    for country, page_number in dictionary.items():
-        # Calculate the actual page number (adding 2 to the dictionary value)
-        actual_page_number = page_number + 2
+    # Map the actual page numbers (adding 2 to the dictionary values) to their countries
+    page_to_country = {page_number + 2: country for country, page_number in dictionary.items()}
+    
+    # Read the PDF once and extract the tables of all country pages in a single call
+    tables = camelot.read_pdf(pdf_file, pages=",".join(map(str, sorted(page_to_country))), flavor='lattice')
+    
+    # Iterate through each table extracted from the pages
+    for table in tables:
+        country = page_to_country[int(table.page)]
+
+        # Extract the data from the table into a DataFrame
+        df = table.df
+        
+        # Set the column names
+        if len(df.columns) < len(columns):
+            df.columns = columns[:len(df.columns)]
+        else:
+            df.columns = columns
+        
         
-        # Read the PDF and extract tables from the specified page
-        tables = camelot.read_pdf(pdf_file, pages=str(actual_page_number))
+        df["Country"] = country
+        print(f"{country} data extracted")
         
-        # Iterate through each table extracted from the page
-        for table in tables:
-            # Extract the data from the table into a DataFrame
-            df = table.df
-            
-            # Set the column names
-            if len(df.columns) < len(columns):
-                df.columns = columns[:len(df.columns)]
-            else:
-                df.columns = columns
-            
-            
-            df["Country"] = country
-            print(f"{country} data extracted")
-            
-            # Append the DataFrame to the list of country dfs
-            dfs.append(df)
+        # Append the DataFrame to the list of country dfs
+        dfs.append(df)
 
     # Concatenate all DataFrames into a single DataFrame
     combined_df = pd.concat(dfs, ignore_index=True)
 
 
     # Data cleaning 
-    combined_df = combined_df.replace(r'\n','', regex=True)        
-    combined_df = combined_df.replace(r' +', ' ', regex=True)
+    # Collapse line breaks and repeated spaces in one pass over the string columns only
+    str_cols = combined_df.select_dtypes('object').columns
+    combined_df[str_cols] = combined_df[str_cols].apply(lambda col: col.str.replace(r'\s+', ' ', regex=True).str.strip())
     combined_df['Instrument (OECD-Lincoln taxonomy)'].replace('', pd.NA, inplace=True)
     combined_df['Instrument (OECD-Lincoln taxonomy)'].fillna(method='ffill', inplace=True)
 
     # Create year variable based on national legal provision
-    combined_df['Year'] = combined_df['National legal provision'].apply(extract_valid_years)
+    combined_df['Year'] = extract_valid_years(combined_df['National legal provision'])
 
 
     ### get subset where no year is recognized but legislation is in place
@@ -1,38 +1,145 @@
 import pandas as pd
 import camelot
 import numpy as np
+import hashlib
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# Extracted tables are cached here, keyed by the content hash of the PDF and the page/area
+cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'marpol')
+
+# Version of the page table cache: bump it when the Camelot call in extract_page_tables changes
+page_cache_version = 1
+
+# Version of the cleaned data cache: bump it when the code of clean_combined_data changes
+# (edits to manual_rows are picked up automatically through their content hash)
+combined_cache_version = 1
+
+# Countries missing from the PDF tables, appended by add_manual_data
+manual_rows = pd.DataFrame({
+    'Country': ['Macau', 'Hong Kong'],
+    'Signature': ['23 May 2006', '20 March 2008'],
+    'EntryintoForce': ['23 May 2006', '20 March 2008']
+})
+
+def get_file_hash(file_path):
+    """
+    Compute the SHA-256 hash of a file's content.
+
+    Parameters:
+    - file_path (str): Path to the file.
+
+    Returns:
+    - str: Hex digest of the file content.
+    """
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def get_cache_file(pdf_hash, page, area):
+    """
+    Build the path of the cache file holding the tables of one page and area.
+
+    Parameters:
+    - pdf_hash (str): SHA-256 hash of the PDF content (see get_file_hash).
+    - page (str): Page number.
+    - area (str): Table area in format 'x1,y1,x2,y2'.
+
+    Returns:
+    - str: Path of the pickle file in cache_dir.
+    """
+    return os.path.join(cache_dir, f"{pdf_hash}_v{page_cache_version}_{page}_{area.replace(',', '-')}.pkl")
+
+def get_combined_cache_file(pdf_hash, pages, table_areas):
+    """
+    Build the path of the cache file holding the cleaned combined data.
+
+    Parameters:
+    - pdf_hash (str): SHA-256 hash of the PDF content (see get_file_hash).
+    - pages (list of str): Page numbers the tables are extracted from.
+    - table_areas (list of str): List of table areas in format 'x1,y1,x2,y2'.
 
-def extract_tables_from_pdf(file_path, pages, table_areas):
+    Returns:
+    - str: Path of the Feather file in cache_dir.
+    """
+    areas = '_'.join(area.replace(',', '-') for area in table_areas)
+    manual_hash = hashlib.sha256(manual_rows.to_csv().encode()).hexdigest()[:8]
+    return os.path.join(cache_dir, f"{pdf_hash}_v{page_cache_version}-{combined_cache_version}_{manual_hash}_{'-'.join(pages)}_{areas}.feather")
+
+def extract_page_tables(file_path, page, area):
+    """
+    Extract the tables in one area of one page using Camelot. Runs in a worker process.
+
+    Parameters:
+    - file_path (str): Path to the MARPOL PDF file.
+    - page (str): Page number to extract tables from.
+    - area (str): Table area in format 'x1,y1,x2,y2'.
+
+    Returns:
+    - list of pandas.DataFrame: DataFrames containing the extracted tables.
     """
-    Extract tables from PDF file using Camelot.
+    tables_page = camelot.read_pdf(file_path, pages=str(page), flavor='stream', table_areas=[area])
+    return [table.df for table in tables_page]
+
+def extract_tables_from_pdf(file_path, pages, table_areas, pdf_hash=None):
+    """
+    Extract tables from PDF file using Camelot. Pages that are not cached yet are
+    extracted in parallel worker processes and then cached on disk, so re-runs on
+    an unchanged PDF skip the extraction.
     
     Parameters:
     - file_path (str): Path to the MARPOL PDF file.
     - pages (str or list): Page number(s) to extract tables from.
     - table_areas (list of str): List of table areas in format 'x1,y1,x2,y2'.
+    - pdf_hash (str, optional): SHA-256 hash of the PDF content, computed from the file if not given.
 
     Returns:
     - list of pandas.DataFrame: List of DataFrames containing extracted tables.
     """
+    # The content hash changes whenever the PDF is modified, which invalidates the cache
+    if pdf_hash is None:
+        pdf_hash = get_file_hash(file_path)
+    cache_files = [get_cache_file(pdf_hash, page, area) for page, area in zip(pages, table_areas)]
+    missing = [(page, area, cache_file) for page, area, cache_file in zip(pages, table_areas, cache_files) if not os.path.exists(cache_file)]
+
+    if missing:
+        os.makedirs(cache_dir, exist_ok=True)
+        missing_pages, missing_areas, missing_files = zip(*missing)
+        # Each page is parsed independently and CPU-bound, so every page gets its own process.
+        # The pages cannot share one read_pdf call: Camelot applies table_areas to every
+        # requested page, and each page here has its own area.
+        with ProcessPoolExecutor(max_workers=min(len(missing), os.cpu_count() or 1)) as executor:
+            results = executor.map(extract_page_tables, repeat(file_path), missing_pages, missing_areas)
+            for cache_file, page_tables in zip(missing_files, results):
+                # Write to a temporary file first, so an interrupted run never leaves a truncated cache file behind
+                tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+                with open(tmp_file, 'wb') as f:
+                    pickle.dump(page_tables, f)
+                os.replace(tmp_file, cache_file)
+
     tables = []
-    for page, area in zip(pages, table_areas):
-        tables_page = camelot.read_pdf(file_path, pages=str(page), flavor='stream', table_areas=[area])
-        for table in tables_page:
-            tables.append(table.df)
+    for cache_file in cache_files:
+        with open(cache_file, 'rb') as f:
+            tables.extend(pickle.load(f))
     return tables
 
 def clean_combined_data(combined):
     """
-    Renames columns and cleans 'Country' strings by removing extra information.
+    Cleans 'Country' strings by removing extra information and parses the
+    signature / entry into force dates into 'sig_year' and 'eff_year'.
     
     Parameters:
-    - combined (pandas.DataFrame): DataFrame containing combined MARPOL data.
+    - combined (pandas.DataFrame): DataFrame containing combined MARPOL data (including the manual rows).
 
     Returns:
     - pandas.DataFrame: Cleaned DataFrame.
     """
-    combined.rename(columns={0: "Country", 1: "Signature", 2: "EntryintoForce"}, inplace=True)
-    combined['Country'] = combined['Country'].fillna('').str.split(' \(').str[0]
+    # Keep the name before ' (' and drop line breaks here, before the names are repeated for every panel year
+    combined['Country'] = combined['Country'].fillna('').str.partition(' (')[0].str.replace('\n', '', regex=False).str.strip()
+    # Parse the dates once per country, the years are then carried through the panel expansion
+    combined['sig_year'] = pd.to_datetime(combined['Signature'], format='%d %B %Y', errors='coerce').dt.year.astype('Int16')
+    combined['eff_year'] = pd.to_datetime(combined['EntryintoForce'], format='%d %B %Y', errors='coerce').dt.year.astype('Int16')
     return combined
 
 def add_manual_data(combined):
@@ -45,36 +152,42 @@ def add_manual_data(combined):
     Returns:
     - pandas.DataFrame: DataFrame with manually added data.
     """
-    new_data = {
-        'Country': ['Macau', 'Hong Kong'],
-        'Signature': ['23 May 2006', '20 March 2008'],
-        'EntryintoForce': ['23 May 2006', '20 March 2008']
-    }
-    new_rows = pd.DataFrame(new_data)
-    combined = pd.concat([combined, new_rows], ignore_index=True)
-    return combined
+    return pd.concat([combined, manual_rows], ignore_index=True, copy=False)
 
 def generate_panel_data(combined):
     """
-    Generate panel data format spanning from 1990 to 2023.
+    Generate panel data format spanning from 1990 to 2023, with the 'marpol_sign'
+    and 'marpol_effect' indicators computed by broadcasting each country's
+    signature / entry into force year against all panel years.
 
     Parameters:
-    - combined (pandas.DataFrame): DataFrame containing combined MARPOL data.
+    - combined (pandas.DataFrame): DataFrame containing combined MARPOL data (with 'sig_year' and 'eff_year').
 
     Returns:
     - pandas.DataFrame: Panel data formatted MARPOL data
     """
-    panel_data = pd.DataFrame()
-    for year in range(1990, 2024):  
-        temp = combined.copy()
-        temp['Year'] = year
-        panel_data = pd.concat([panel_data, temp], axis=0)
+    years = np.arange(1990, 2024, dtype=np.int16)
+    sig = combined['sig_year'].to_numpy(dtype='float64', na_value=np.nan)
+    eff = combined['eff_year'].to_numpy(dtype='float64', na_value=np.nan)
+
+    # countries x years indicator matrices (missing years compare as False)
+    sign_mat = (sig[:, None] <= years).astype(np.int8)
+    eff_mat = (eff[:, None] <= years).astype(np.int8)
+    sign_mat[:, years < 1997] = 0
+    eff_mat[:, years < 2005] = 0
+
+    panel_data = pd.DataFrame({
+        'Country': np.repeat(combined['Country'].to_numpy(), len(years)),
+        'Year': np.tile(years, len(combined)),
+        'marpol_sign': sign_mat.ravel(),
+        'marpol_effect': eff_mat.ravel()
+    })
     return panel_data
 
 def clean_panel_data(panel_data):
     """
-    Clean panel data by converting date columns to years, handling NaN values,
-    and creating 'marpol_sign' and 'marpol_effect' columns.
+    Clean panel data by storing country names as categories and sorting
+    by country and year.
 
     Parameters:
     - panel_data (pandas.DataFrame): DataFrame containing panel data.
@@ -82,24 +195,18 @@ def clean_panel_data(panel_data):
     Returns:
     - pandas.DataFrame: Cleaned panel data.
     """
-    panel_data['Signature'] = pd.to_datetime(panel_data['Signature'], errors='coerce').dt.year
-    panel_data['EntryintoForce'] = pd.to_datetime(panel_data['EntryintoForce'], errors='coerce').dt.year
-    panel_data['Country'] = panel_data['Country'].str.replace('\n', '')
-
-    panel_data.loc[panel_data['Year'] < 2005, 'EntryintoForce'] = np.nan
-    panel_data.loc[panel_data['Year'] < 1997, 'Signature'] = np.nan
+    # Each country repeats for every year: store it as category codes, which also makes the sort an integer sort
+    panel_data['Country'] = panel_data['Country'].astype('category')
 
-    panel_data['marpol_sign'] = (panel_data['Signature'] <= panel_data['Year']).astype(int)
-    panel_data['marpol_effect'] = (panel_data['EntryintoForce'] <= panel_data['Year']).astype(int)
-
-    panel_data = panel_data.sort_values(by=['Country', 'Year']).reset_index(drop=True)
+    panel_data = panel_data.sort_values(by=['Country', 'Year'], kind='stable', ignore_index=True)
     panel_data = panel_data[['Country', 'Year', 'marpol_sign', 'marpol_effect']]
 
     return panel_data
 
-def save_to_excel(combined, output_path):
+def save_to_excel(combined, panel_data, output_path):
     """
-    Save combined data (raw data) and panel data to Excel file.
+    Save combined data (raw data) and panel data to Excel file. The panel data is
+    also written as a Parquet file next to it for fast reloading downstream.
 
     Parameters:
     - combined (pandas.DataFrame): DataFrame containing combined data.
@@ -107,12 +214,10 @@ def save_to_excel(combined, output_path):
     - output_path (str): Output file path for Excel file.
     """
     with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
-        combined.to_excel(writer, sheet_name='raw data', index=False)
-        
-        panel_data_full = generate_panel_data(combined)
-        panel_data_cleaned = clean_panel_data(panel_data_full)
-        
-        panel_data_cleaned.to_excel(writer, sheet_name='panel data', index=False)
+        combined.drop(columns=['sig_year', 'eff_year']).to_excel(writer, sheet_name='raw data', index=False)
+        panel_data.to_excel(writer, sheet_name='panel data', index=False)
+
+    panel_data.to_parquet(os.path.splitext(output_path)[0] + '.parquet', compression='zstd', index=False)
 
 
 
@@ -133,13 +238,28 @@ if __name__ == "__main__":
     table_areas = ['50,615,550,50', '50,800,550,200']
     pages = ['189', '190']
 
-    # Step 1: Extract data from PDF
-    tables = extract_tables_from_pdf(file_path, pages, table_areas)
-    combined_data = pd.concat(tables, ignore_index=True)
-
-    # Step 2: Clean and add manual data
-    combined_data = clean_combined_data(combined_data)
-    combined_data = add_manual_data(combined_data)
-
-    # Step 3: Save raw and panel data to Excel
-    save_to_excel(combined_data, output_path)
+    # The cleaned data is cached by the content hash of the PDF (and the pages/areas read from it),
+    # so re-runs on an unchanged PDF skip steps 1-2. The PDF is on a network share, so it is hashed only once
+    pdf_hash = get_file_hash(file_path)
+    combined_cache = get_combined_cache_file(pdf_hash, pages, table_areas)
+
+    if os.path.exists(combined_cache):
+        combined_data = pd.read_feather(combined_cache)
+    else:
+        # Step 1: Extract data from PDF
+        tables = extract_tables_from_pdf(file_path, pages, table_areas, pdf_hash)
+        combined_data = pd.concat(tables, ignore_index=True, copy=False).rename(columns={0: "Country", 1: "Signature", 2: "EntryintoForce"})
+
+        # Step 2: Add manual data and clean, so the manual rows get their years parsed too
+        combined_data = add_manual_data(combined_data)
+        combined_data = clean_combined_data(combined_data)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = f"{combined_cache}.{os.getpid()}.tmp"
+        combined_data.to_feather(tmp_file)
+        os.replace(tmp_file, combined_cache)
+
+    # Step 3: Build the panel data once
+    panel_data = clean_panel_data(generate_panel_data(combined_data))
+
+    # Step 4: Save raw and panel data to Excel
+    save_to_excel(combined_data, panel_data, output_path)